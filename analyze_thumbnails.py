@@ -1,17 +1,54 @@
 import csv
-import json
+import hashlib
 import os
+import numpy as np
+import orjson
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from io import BytesIO
+from json_repair import repair_json
 from openai import OpenAI
-from colorthief import ColorThief
+from PIL import Image
 from datetime import datetime
 
+# Optional: libjpeg-turbo decoding (SIMD IDCT) is ~2-3x faster than Pillow
+# for the 1280x720 maxresdefault JPEGs; we fall back to Pillow without it
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=openai_api_key)
+# max_retries gives us built-in backoff when OpenAI rate-limits a worker
+client = OpenAI(api_key=openai_api_key, max_retries=5)
+
+# Shared session so thumbnail downloads reuse pooled keep-alive connections
+session = requests.Session()
+
+# On-disk cache of raw GPT analyses keyed by sha256 of the thumbnail bytes,
+# so identical thumbnails (re-runs, reuploads) cost one API call total
+GPT_CACHE_DIR = os.path.join(".cache", "gpt")
+
+def cached_gpt_analysis(thumbnail_bytes, image_url, color_palette_hex):
+    """
+    Returns the raw GPT analysis for a thumbnail, consulting the disk cache
+    first. Hashing ~50KB of JPEG is trivial next to an OpenAI round-trip.
+    """
+    digest = hashlib.sha256(thumbnail_bytes).hexdigest()
+    cache_path = os.path.join(GPT_CACHE_DIR, f"{digest}.txt")
+    if os.path.isfile(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    raw_analysis = analyze_image_with_gpt(image_url, color_palette_hex)
+
+    os.makedirs(GPT_CACHE_DIR, exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        f.write(raw_analysis)
+    return raw_analysis
 
 def load_video_ids_from_csv(file_path):
     """
@@ -31,12 +68,53 @@ def generate_youtube_thumbnail_urls(video_ids):
     return [f"{base_url}/{vid}/maxresdefault.jpg" for vid in video_ids]
 
 def extract_colors_from_url(url, color_count=3):
-    response = requests.get(url)
+    response = session.get(url)
     response.raise_for_status()
-    img_bytes = BytesIO(response.content)
-    color_thief = ColorThief(img_bytes)
-    palette_rgb = color_thief.get_palette(color_count=color_count)
-    hex_palette = [f"#{r:02x}{g:02x}{b:02x}" for (r, g, b) in palette_rgb]
+    return extract_colors_from_bytes(response.content, color_count=color_count)
+
+def decode_thumbnail_pixels(image_bytes):
+    """
+    Decode a thumbnail into a small RGB uint8 array. ~100x100 is plenty of
+    signal for a dominant-color palette, so we downscale aggressively.
+    Uses simplejpeg (libjpeg-turbo) when available, Pillow otherwise.
+    """
+    if simplejpeg is not None and simplejpeg.is_jpeg(image_bytes):
+        pixels = simplejpeg.decode_jpeg(
+            image_bytes, colorspace="RGB",
+            min_height=100, min_width=100,
+            fastdct=True, fastupsample=True,
+        )
+        # decode_jpeg only scales down to the nearest JPEG factor, so finish
+        # with a cheap stride-based subsample to ~100px
+        step_y = max(1, pixels.shape[0] // 100)
+        step_x = max(1, pixels.shape[1] // 100)
+        return pixels[::step_y, ::step_x]
+
+    img = Image.open(BytesIO(image_bytes)).convert("RGB")
+    return np.asarray(img.resize((100, 100), Image.BILINEAR))
+
+def extract_colors_from_bytes(image_bytes, color_count=3):
+    """
+    Dominant-color palette via a numpy color histogram: downscale, quantize
+    each channel to 5 bits, count packed 15-bit keys with bincount, and take
+    the top color_count bins. Much faster than colorthief's pure-Python
+    median-cut over every pixel.
+    """
+    pixels = decode_thumbnail_pixels(image_bytes)
+
+    quantized = (pixels >> 3).astype(np.uint32)
+    keys = (quantized[..., 0] << 10) | (quantized[..., 1] << 5) | quantized[..., 2]
+    counts = np.bincount(keys.ravel(), minlength=1 << 15)
+
+    top = np.argpartition(counts, -color_count)[-color_count:]
+    top = top[np.argsort(counts[top])[::-1]]  # most common first
+
+    hex_palette = []
+    for key in top:
+        r = ((key >> 10) & 0x1F) << 3
+        g = ((key >> 5) & 0x1F) << 3
+        b = (key & 0x1F) << 3
+        hex_palette.append(f"#{r:02x}{g:02x}{b:02x}")
     return hex_palette
 
 def analyze_image_with_gpt(image_url, color_palette_hex):
@@ -109,9 +187,16 @@ def parse_gpt_json(raw_analysis, do_repair_pass=True):
     if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
         json_candidate = raw_analysis[start_idx : end_idx + 1]
         try:
-            return json.loads(json_candidate)
-        except json.JSONDecodeError:
-            pass  # We'll try the repair pass next
+            return orjson.loads(json_candidate)
+        except orjson.JSONDecodeError:
+            pass  # We'll try the repair passes next
+
+        # Local repair first: fixes trailing commas, unquoted keys, etc. in
+        # microseconds, so the expensive GPT pass is only a last resort
+        try:
+            return orjson.loads(repair_json(json_candidate))
+        except Exception:
+            pass
 
     # Repair pass: second GPT attempt if desired
     if do_repair_pass:
@@ -131,108 +216,125 @@ def parse_gpt_json(raw_analysis, do_repair_pass=True):
             if rs_start != -1 and rs_end != -1 and rs_start < rs_end:
                 repaired_candidate = repaired_text[rs_start : rs_end + 1]
                 try:
-                    return json.loads(repaired_candidate)
-                except json.JSONDecodeError:
+                    return orjson.loads(repaired_candidate)
+                except orjson.JSONDecodeError:
                     pass
         except Exception:
             pass
 
     return {}
 
-def batch_analyze_thumbnails(video_ids, output_csv):
-    fieldnames = [
-        "video_id",
-        "thumbnail_url",
-        "color_palette_hex",
-        "detected_text",
-        "objects",
-        "people_count",
-        "faces",
-        "brand_logos",
-        "layout",
-        "font_style",
-        "cta_detected",
-        "scene_classification",
-        "color_scheme",
-        "summary",
-        "faces_emotions_only",
-        "text_style_category",
-        "color_category_strict",
-        "raw_analysis"
-    ]
+# Output schema is fixed, so rows are plain tuples in this order and go
+# through csv.writer — no per-row dict building or DictWriter reordering
+CSV_FIELDS = (
+    "video_id",
+    "thumbnail_url",
+    "color_palette_hex",
+    "detected_text",
+    "objects",
+    "people_count",
+    "faces",
+    "brand_logos",
+    "layout",
+    "font_style",
+    "cta_detected",
+    "scene_classification",
+    "color_scheme",
+    "summary",
+    "faces_emotions_only",
+    "text_style_category",
+    "color_category_strict",
+    "raw_analysis"
+)
 
-    thumbnail_urls = generate_youtube_thumbnail_urls(video_ids)
+def analyze_one_thumbnail(vid, url):
+    """
+    Runs the full per-video pipeline (color extraction + GPT analysis) and
+    returns the CSV row as a tuple matching CSV_FIELDS. Safe to call from
+    worker threads since all the work is network I/O against the thumbnail
+    CDN and OpenAI.
+    """
+    color_palette_hex = ""
+    raw_analysis = ""
+    parsed = {}
+    error = ""
 
-    with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for vid, url in zip(video_ids, thumbnail_urls):
-            row_data = {
-                "video_id": vid,
-                "thumbnail_url": url,
-                "color_palette_hex": "",
-                "detected_text": "",
-                "objects": "",
-                "people_count": "",
-                "faces": "",
-                "brand_logos": "",
-                "layout": "",
-                "font_style": "",
-                "cta_detected": "",
-                "scene_classification": "",
-                "color_scheme": "",
-                "summary": "",
-                "faces_emotions_only": "",
-                "text_style_category": "",
-                "color_category_strict": "",
-                "raw_analysis": ""
-            }
-
-            try:
-                # Extract local color data
-                hex_palette = extract_colors_from_url(url, color_count=3)
-                row_data["color_palette_hex"] = ", ".join(hex_palette)
-
-                # GPT analysis
-                raw_analysis = analyze_image_with_gpt(url, hex_palette)
-                row_data["raw_analysis"] = raw_analysis
-
-                # Parse JSON
-                parsed = parse_gpt_json(raw_analysis, do_repair_pass=True)
-
-                # Fill out fields
-                row_data["detected_text"] = parsed.get("detected_text", "")
-                row_data["objects"] = ", ".join(parsed.get("objects", []))
-                row_data["people_count"] = str(parsed.get("people_count", ""))
-
-                faces = parsed.get("faces", [])
-                row_data["faces"] = "; ".join(
-                    f"{face.get('emotion','?')}({face.get('description','')})"
-                    for face in faces
-                )
+    try:
+        # Download the thumbnail once; the bytes feed both the color
+        # extraction and the GPT cache key
+        response = session.get(url)
+        response.raise_for_status()
+        thumbnail_bytes = response.content
+
+        # Extract local color data
+        hex_palette = extract_colors_from_bytes(thumbnail_bytes, color_count=3)
+        color_palette_hex = ", ".join(hex_palette)
+
+        # GPT analysis (disk-cached by thumbnail hash)
+        raw_analysis = cached_gpt_analysis(thumbnail_bytes, url, hex_palette)
+
+        # Parse JSON
+        parsed = parse_gpt_json(raw_analysis, do_repair_pass=True)
+    except Exception as e:
+        error = f"Error: {str(e)}"
 
-                row_data["brand_logos"] = ", ".join(parsed.get("brand_logos", []))
-                row_data["layout"] = parsed.get("layout", "")
-                row_data["font_style"] = parsed.get("font_style", "")
-                row_data["cta_detected"] = str(parsed.get("cta_detected", ""))
-                row_data["scene_classification"] = parsed.get("scene_classification", "")
-                row_data["color_scheme"] = parsed.get("color_scheme", "")
-                row_data["summary"] = parsed.get("summary", "")
+    # The parsed dict is whatever GPT returned, so the shaping below can
+    # still blow up on unexpected field shapes (non-string list items,
+    # a string where a list of dicts was expected, ...). Degrade those
+    # to an error row too instead of letting the exception kill the batch.
+    try:
+        get = parsed.get
+        raw_faces_emotions = get("faces_emotions_only", [])
+        if isinstance(raw_faces_emotions, list):
+            faces_emotions_only = ", ".join(raw_faces_emotions)
+        else:
+            faces_emotions_only = str(raw_faces_emotions)
 
-                raw_faces_emotions = parsed.get("faces_emotions_only", [])
-                if isinstance(raw_faces_emotions, list):
-                    row_data["faces_emotions_only"] = ", ".join(raw_faces_emotions)
-                else:
-                    row_data["faces_emotions_only"] = str(raw_faces_emotions)
+        return (
+            vid,
+            url,
+            color_palette_hex,
+            get("detected_text", ""),
+            ", ".join(get("objects", [])),
+            str(get("people_count", "")),
+            "; ".join(
+                f"{face.get('emotion','?')}({face.get('description','')})"
+                for face in get("faces", [])
+            ),
+            ", ".join(get("brand_logos", [])),
+            get("layout", ""),
+            get("font_style", ""),
+            str(get("cta_detected", "")),
+            get("scene_classification", ""),
+            get("color_scheme", ""),
+            error or get("summary", ""),
+            faces_emotions_only,
+            get("text_style_category", ""),
+            get("color_category_strict", ""),
+            raw_analysis
+        )
+    except Exception as e:
+        error = error or f"Error: {str(e)}"
+        return (
+            vid, url, color_palette_hex,
+            "", "", "", "", "", "", "", "", "", "",
+            error, "", "", "",
+            raw_analysis
+        )
 
-                row_data["text_style_category"] = parsed.get("text_style_category", "")
-                row_data["color_category_strict"] = parsed.get("color_category_strict", "")
+def batch_analyze_thumbnails(video_ids, output_csv, max_workers=8):
+    thumbnail_urls = generate_youtube_thumbnail_urls(video_ids)
 
-            except Exception as e:
-                row_data["summary"] = f"Error: {str(e)}"
+    with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
 
-            writer.writerow(row_data)
+        # The per-video work is almost entirely network wait, so fan it out
+        # across threads. executor.map preserves input order, and the CSV
+        # writes stay in this (main) thread so rows never interleave.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for row in executor.map(analyze_one_thumbnail, video_ids, thumbnail_urls):
+                writer.writerow(row)
 
     print(f"Analysis complete! Results stored in '{output_csv}'.")
 
